@@ -0,0 +1,143 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2018, Galen Curwen-McAdams
+
+import attr
+import numpy as np
+from ma_wip.ling_classes import Group
+
+def _column(values=None, dtype=np.float64):
+    if values is None:
+        values = []
+    return np.asarray(values, dtype=dtype)
+
+@attr.s
+class GroupCollection(object):
+    """Regions of many Groups stored as columns
+
+    x, y, x2, y2 hold one entry per region and group_id
+    holds the index of the region's group in names,
+    colors, hides, sources and source_dimensions.
+    Geometry methods return one row per group"""
+    x = attr.ib(default=None, converter=_column)
+    y = attr.ib(default=None, converter=_column)
+    x2 = attr.ib(default=None, converter=_column)
+    y2 = attr.ib(default=None, converter=_column)
+    group_id = attr.ib(default=None, converter=lambda values: _column(values, dtype=np.intp))
+    names = attr.ib(default=attr.Factory(list))
+    colors = attr.ib(default=attr.Factory(list))
+    hides = attr.ib(default=attr.Factory(list))
+    sources = attr.ib(default=attr.Factory(list))
+    # (groups, 2) width, height with nan if missing
+    source_dimensions = attr.ib(default=None, converter=lambda values: _column(values).reshape(-1, 2))
+
+    @classmethod
+    def from_groups(cls, groups):
+        regions = []
+        group_ids = []
+        source_dimensions = []
+        for group_id, group in enumerate(groups):
+            regions.extend(region[:4] for region in group.regions)
+            group_ids.extend([group_id] * len(group.regions))
+            if group.source_dimensions and len(group.source_dimensions) >= 2:
+                source_dimensions.append(group.source_dimensions[:2])
+            else:
+                source_dimensions.append([np.nan, np.nan])
+        regions = _column(regions).reshape(-1, 4)
+        return cls(x=regions[:, 0],
+                   y=regions[:, 1],
+                   x2=regions[:, 2],
+                   y2=regions[:, 3],
+                   group_id=group_ids,
+                   names=[group.name for group in groups],
+                   colors=[group.color for group in groups],
+                   hides=[group.hide for group in groups],
+                   sources=[group.source for group in groups],
+                   source_dimensions=source_dimensions)
+
+    def to_groups(self):
+        """Return a list of Groups
+
+        columns are float, so region coordinates are
+        returned as floats and source_dimensions as
+        [width, height] even if the original Groups
+        used ints or had more entries"""
+        regions = [[] for _ in self.names]
+        for group_id, region in zip(self.group_id.tolist(), self.regions.tolist()):
+            regions[group_id].append(region)
+        groups = []
+        for group_id, name in enumerate(self.names):
+            source_dimensions = self.source_dimensions[group_id]
+            if np.isnan(source_dimensions).any():
+                source_dimensions = []
+            else:
+                source_dimensions = source_dimensions.tolist()
+            groups.append(Group(regions=regions[group_id],
+                                color=self.colors[group_id],
+                                name=name,
+                                hide=self.hides[group_id],
+                                source_dimensions=source_dimensions,
+                                source=self.sources[group_id]))
+        return groups
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def regions(self):
+        return np.column_stack((self.x, self.y, self.x2, self.y2))
+
+    def region_rectangle(self):
+        """Return (groups, 4) array of min x, min y,
+        max x, max y of each group's regions, groups
+        without regions are nan"""
+        rects = np.full((len(self), 4), np.nan)
+        if len(self.group_id):
+            rects[:, :2] = np.inf
+            rects[:, 2:] = -np.inf
+            np.minimum.at(rects[:, 0], self.group_id, self.x)
+            np.minimum.at(rects[:, 1], self.group_id, self.y)
+            np.maximum.at(rects[:, 2], self.group_id, self.x2)
+            np.maximum.at(rects[:, 3], self.group_id, self.y2)
+            rects[np.isinf(rects)] = np.nan
+        return rects
+
+    def bounding_rectangle(self):
+        """Return (groups, 4) array of x y w h"""
+        rects = self.region_rectangle()
+        rects[:, 2] -= rects[:, 0]
+        rects[:, 3] -= rects[:, 1]
+        return rects
+
+    def scaled_bounding_rectangle(self, display_offset_x, display_offset_y, source_width, source_height):
+        """Return (groups, 4) array of rectangles scaled
+        to fullsize and shifted to upper left 0,0 as
+        Group.scaled_bounding_rectangle
+
+        arguments may be scalars or one value per group,
+        rows that cannot be scaled are nan"""
+        rect = self.region_rectangle()
+        # remove offsets, y offset is not removed
+        # to match Group.scaled_bounding_rectangle
+        rect[:, 0] -= display_offset_x
+        rect[:, 2] -= display_offset_x
+        source_height = np.asarray(source_height, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_scale = np.asarray(source_width, dtype=np.float64) / self.source_dimensions[:, 0]
+            y_scale = source_height / self.source_dimensions[:, 1]
+        rect[:, 0::2] = np.round(rect[:, 0::2] * x_scale[:, None])
+        rect[:, 1::2] = np.round(rect[:, 1::2] * y_scale[:, None])
+        # kivy canvas 0,0 is lower left corner
+        # pillow 0,0 is upper left corner
+        rect[:, 1::2] = np.abs(rect[:, 1::2] - np.reshape(source_height, (-1, 1)))
+        rect[~np.isfinite(rect).all(axis=1)] = np.nan
+        return rect
+
+    def bounding_contains_point(self, x, y):
+        """Return boolean array, True where the point
+        is strictly inside a group's bounding rectangle"""
+        rect = self.region_rectangle()
+        with np.errstate(invalid='ignore'):
+            return (rect[:, 0] < x) & (x < rect[:, 2]) & (rect[:, 1] < y) & (y < rect[:, 3])
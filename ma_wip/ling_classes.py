@@ -5,6 +5,9 @@
 # Copyright (c) 2018, Galen Curwen-McAdams
 
 import uuid
+import heapq
+import itertools
+import collections
 import attr
 import colour
 
@@ -53,6 +56,90 @@ class RuleSet(object):
     def as_string(self):
         return ""
 
+    @property
+    def overlaps(self):
+        return rule_overlaps(self.rules)
+
+    @property
+    def conflicts(self):
+        return [overlap for overlap in rule_overlaps(self.rules) if overlap.conflict]
+
+@attr.s
+class RuleOverlap(object):
+    source_field = attr.ib(default="")
+    comparator_symbol = attr.ib(default="")
+    rules = attr.ib(default=attr.Factory(tuple))
+
+    @property
+    def conflict(self):
+        # overlapping rules conflict if they set
+        # different results for the same field
+        if len(self.rules) != 2:
+            return False
+        first, second = self.rules
+        return first.dest_field == second.dest_field and first.rule_result != second.rule_result
+
+def rule_overlaps(rules):
+    """Return a list of RuleOverlaps for every pair
+    of rules with the same source_field and comparator
+    that can match the same value
+
+    between ranges are found with a sorted sweep and
+    ~~ / is params by hashing so cost is O(n log n + k)
+    for k reported pairs. Rules with missing or
+    unparseable params are skipped"""
+    grouped = collections.defaultdict(list)
+    for rule in rules:
+        grouped[(rule.source_field, rule.comparator_symbol)].append(rule)
+
+    overlaps = []
+    for (source_field, symbol), group in grouped.items():
+        if symbol == "between":
+            pairs = _between_overlaps(group)
+        elif symbol == "~~":
+            pairs = _keyed_overlaps(group, lambda params: params[0].strip('"').casefold())
+        elif symbol == "is":
+            pairs = _keyed_overlaps(group, lambda params: params[0])
+        else:
+            pairs = []
+        for pair in pairs:
+            overlaps.append(RuleOverlap(source_field=source_field, comparator_symbol=symbol, rules=pair))
+    return overlaps
+
+def _between_overlaps(rules):
+    intervals = []
+    for rule in rules:
+        try:
+            low, high = sorted(int(param) for param in rule.comparator_params[:2])
+        except (ValueError, TypeError):
+            continue
+        intervals.append((low, high, rule))
+    intervals.sort(key=lambda interval: (interval[0], interval[1]))
+
+    pairs = []
+    # heap of (high, position, rule) for ranges still open
+    active = []
+    for position, (low, high, rule) in enumerate(intervals):
+        # ranges are inclusive, drop those ending before low
+        while active and active[0][0] < low:
+            heapq.heappop(active)
+        for _, _, other in active:
+            pairs.append((other, rule))
+        heapq.heappush(active, (high, position, rule))
+    return pairs
+
+def _keyed_overlaps(rules, key):
+    buckets = collections.defaultdict(list)
+    for rule in rules:
+        try:
+            buckets[key(rule.comparator_params)].append(rule)
+        except (IndexError, AttributeError, TypeError):
+            continue
+    pairs = []
+    for bucket in buckets.values():
+        pairs.extend(itertools.combinations(bucket, 2))
+    return pairs
+
 @attr.s
 class RuleSymbols(object):
     symbols = {
@@ -0,0 +1,178 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Copyright (c) 2018, Galen Curwen-McAdams
+
+# render visualizations from json lines jobs
+#
+# each line of input is a job such as:
+# {"type": "dimensions", "args": {"project": {"width": 10, "height": 20, "depth": 5}}}
+# {"type": "overview", "id": "foo", "args": {"project": {...}, "width": 400, "height": 50}}
+# {"type": "rules", "args": {"rules": [{...}], "groups": [{...}]}, "output": "/tmp/rules.jpg"}
+# {"type": "groups", "args": {"groups": [{...}]}}
+#
+# a json line is written to stdout for each job as it finishes:
+# {"line": 1, "id": "foo", "output": "/path/to/foo.jpg"}
+# {"line": 2, "id": null, "error": "..."}
+#
+# pillow and colour are only imported by workers so
+# that --help and argument errors return quickly
+
+import argparse
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import os
+import sys
+
+JOB_TYPES = ['overview', 'dimensions', 'rules', 'groups']
+
+def job_renderer(job_type):
+    from ma_wip import visualizations
+    renderers = {
+        'overview' : visualizations.project_overview,
+        'dimensions' : visualizations.project_dimensions,
+        'rules' : visualizations.rules,
+        'groups' : visualizations.groups,
+    }
+    return renderers[job_type]
+
+def job_arguments(job_type, args):
+    # rules and groups are passed as dicts and
+    # converted to Rule and Group objects
+    from ma_wip.ling_classes import Rule, Group
+    args = dict(args)
+    args.pop('filename', None)
+    if job_type in ('rules', 'groups'):
+        groups = []
+        for group in args.get('groups', []) or []:
+            group = dict(group)
+            if isinstance(group.get('color'), str):
+                import colour
+                group['color'] = colour.Color(group['color'])
+            groups.append(Group(**group))
+        args['groups'] = groups
+    if job_type == 'rules':
+        args['rules'] = [Rule(**rule) for rule in args.get('rules', [])]
+    return args
+
+def output_name(name):
+    # ids are used as file names in output_dir,
+    # replace separators so they stay there
+    name = str(name)
+    for separator in (os.sep, os.altsep):
+        if separator:
+            name = name.replace(separator, "_")
+    return name
+
+def job_id(line):
+    try:
+        return json.loads(line).get('id')
+    except Exception:
+        return None
+
+def error_result(line_number, line, ex):
+    return {'line' : line_number, 'id' : job_id(line), 'error' : "{}: {}".format(type(ex).__name__, ex)}
+
+def render_job(line_number, line, output_dir):
+    result = {'line' : line_number, 'id' : None}
+    try:
+        job = json.loads(line)
+        result['id'] = job.get('id')
+        job_type = job['type']
+        if job_type not in JOB_TYPES:
+            raise ValueError("unknown job type: {}".format(job_type))
+        output = job.get('output')
+        if not output:
+            name = job.get('id') or "{}-{}".format(job_type, line_number)
+            output = os.path.join(output_dir, "{}.jpg".format(output_name(name)))
+        # renderers print debugging output, keep
+        # stdout for json lines results only
+        with contextlib.redirect_stdout(sys.stderr):
+            _, file = job_renderer(job_type)(**job_arguments(job_type, job.get('args', {})))[:2]
+        with open(output, 'wb') as f:
+            f.write(file.getbuffer())
+        result['output'] = os.path.abspath(output)
+    except Exception as ex:
+        result['error'] = "{}: {}".format(type(ex).__name__, ex)
+    return result
+
+def read_jobs(stream):
+    # yield (line_number, line) lazily, skipping blank lines
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield line_number, line
+
+def render_jobs(jobs, output_dir, workers=None, executor_class=concurrent.futures.ProcessPoolExecutor):
+    """Render (line_number, line) jobs with a pool of
+    workers and yield result dicts as they complete
+
+    At most workers * 2 jobs are queued at once so
+    input of any length is not held in memory. If a
+    worker dies the jobs in flight are reported as
+    errors and a new pool is started for the rest"""
+    workers = workers or os.cpu_count() or 1
+    jobs = iter(jobs)
+    executor = executor_class(max_workers=workers)
+    # future : (line_number, line)
+    pending = {}
+
+    def submit(count):
+        for line_number, line in itertools.islice(jobs, count):
+            pending[executor.submit(render_job, line_number, line, output_dir)] = (line_number, line)
+
+    try:
+        submit(workers * 2)
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                line_number, line = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as ex:
+                    broken = broken or isinstance(ex, concurrent.futures.BrokenExecutor)
+                    result = error_result(line_number, line, ex)
+                yield result
+            if broken:
+                # a broken pool fails every job still in it
+                for line_number, line in pending.values():
+                    yield error_result(line_number, line, concurrent.futures.BrokenExecutor("worker pool terminated"))
+                pending.clear()
+                executor.shutdown(wait=False)
+                executor = executor_class(max_workers=workers)
+            submit(workers * 2 - len(pending))
+    finally:
+        executor.shutdown()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="render visualizations from json lines jobs, writing json lines results to stdout")
+    parser.add_argument("input", nargs="?", default="-", help="json lines file of jobs, - for stdin (default)")
+    parser.add_argument("--output-dir", default=".", help="directory for outputs of jobs without an output path")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to cpu count")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.input == "-":
+        stream = sys.stdin
+    else:
+        stream = open(args.input, 'r')
+
+    errors = 0
+    try:
+        for result in render_jobs(read_jobs(stream), args.output_dir, workers=args.workers):
+            if 'error' in result:
+                errors += 1
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,9 +7,148 @@
 from PIL import Image as PILImage, ImageDraw, ImageColor, ImageFont
 import uuid
 import functools
+import math
 import io
+import queue
+import threading
+
+# upper limit in bytes for a rendered canvas, used when
+# a renderer is not passed an explicit memory_budget.
+# set to None to disable the check globally
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# default for memory_budget arguments, since None
+# passed explicitly disables the check for that call
+DEFAULT_BUDGET = object()
+# share of a memory budget used for the canvas, the
+# rest is headroom for encoding and the encoded output
+CANVAS_BUDGET_FRACTION = 0.75
+
+def canvas_bytes(width, height, mode='RGB'):
+    """Return approximate memory in bytes
+    used by a pillow image of size and mode"""
+    # pillow stores multiband images (RGB included)
+    # as 32 bits per pixel
+    if mode in ('1', 'L', 'P'):
+        pixel_bytes = 1
+    else:
+        pixel_bytes = 4
+    return int(width) * int(height) * pixel_bytes
+
+def fit_scale(canvas_size, scale, budget, mode='RGB', iterations=50):
+    """Return the largest scale <= scale where
+    canvas_bytes(*canvas_size(scale)) fits in budget
+
+    canvas_size is a callable returning (width, height)
+    for a given scale. Raises ValueError if even a scale
+    of 0 will not fit"""
+    if budget is None or canvas_bytes(*canvas_size(scale), mode=mode) <= budget:
+        return scale
+
+    if canvas_bytes(*canvas_size(0), mode=mode) > budget:
+        raise ValueError("canvas exceeds memory budget of {} bytes at any scale".format(budget))
+
+    # canvas size only grows with scale, so bisect
+    low = 0
+    high = scale
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        if canvas_bytes(*canvas_size(middle), mode=mode) <= budget:
+            low = middle
+        else:
+            high = middle
+    return low
+
+class ChunkWriter(object):
+    """File-like object passing each write to a
+    bounded queue, used to stream an encoder's
+    output to a consuming thread"""
+
+    def __init__(self, max_chunks=4):
+        self.chunks = queue.Queue(max_chunks)
+        self.cancelled = threading.Event()
+
+    def write(self, data):
+        if data:
+            chunk = bytes(data)
+            while not self.cancelled.is_set():
+                try:
+                    self.chunks.put(chunk, timeout=0.1)
+                    return len(chunk)
+                except queue.Full:
+                    pass
+            raise IOError("stream closed by reader")
+        return 0
+
+    def flush(self):
+        pass
+
+def encoded_chunks(img, extension='JPEG', max_chunks=4, **save_args):
+    """Encode img in a thread and yield encoded bytes
+    as the encoder produces them, closing img when done
+
+    at most max_chunks encoded chunks are buffered
+    so a slow reader pauses the encoder"""
+    writer = ChunkWriter(max_chunks)
+    done = object()
+    errors = []
+
+    def encode():
+        try:
+            img.save(writer, extension, **save_args)
+        except Exception as ex:
+            errors.append(ex)
+        finally:
+            img.close()
+            while not writer.cancelled.is_set():
+                try:
+                    writer.chunks.put(done, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    encoder = threading.Thread(target=encode, daemon=True)
+    encoder.start()
+    try:
+        while True:
+            chunk = writer.chunks.get()
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        # reader finished or abandoned the generator
+        writer.cancelled.set()
+        encoder.join()
+    if errors:
+        raise errors[0]
+
+def image_output(img, filename=None, extension='JPEG', stream=False):
+    """Return (filename, file) for a rendered image
+
+    if filename is truthy the image is also saved to
+    a file in /tmp and its path returned. file is a
+    BytesIO or, if stream is True, an iterator of
+    encoded chunks that can be sent as they arrive"""
+    if filename:
+        image_filename = '/tmp/{}.jpg'.format(str(uuid.uuid4()))
+        img.save(image_filename)
+        filename = image_filename
 
-def project_dimensions(project, width=200, height=200, scale=1, background_color=(155, 155, 155, 255), filename=None):
+    if stream:
+        return (filename, encoded_chunks(img, extension))
+
+    file = io.BytesIO()
+    img.save(file, extension)
+    img.close()
+    file.seek(0)
+
+    return (filename, file)
+
+def project_dimensions(project, width=200, height=200, scale=1, background_color=(155, 155, 155, 255), filename=None, memory_budget=DEFAULT_BUDGET, return_scale=False, stream=False):
+    # memory_budget is in bytes, DEFAULT_MEMORY_BUDGET if not
+    # given and no limit if None. When the canvas needed for scale would exceed
+    # the budget a smaller scale is used instead. If return_scale
+    # is True the effective scale is returned as a third value.
+    # If stream is True file is an iterator of encoded chunks
     x_offset = 10
     y_offset = 10
     drawn_x = 0
@@ -17,6 +156,9 @@ def project_dimensions(project, width=200, height=200, scale=1, background_color
     figure_spacing = 20
     fore_shorten = 0.5
 
+    if memory_budget is DEFAULT_BUDGET:
+        memory_budget = DEFAULT_MEMORY_BUDGET
+
     # width = width * 2 + depth * 2
 
     d = {}
@@ -27,10 +169,11 @@ def project_dimensions(project, width=200, height=200, scale=1, background_color
 
     for dimension in ['width', 'height', 'depth']:
         try:
-            d[dimension] = float(project[dimension]) * scale
             d["unscaled_" + dimension] = float(project[dimension])
         except Exception as ex:
-            d[dimension]  = 0 * scale
+            d["unscaled_" + dimension]  = 0
+        # nan or inf can not be drawn, treat as unparseable
+        if not math.isfinite(d["unscaled_" + dimension]):
             d["unscaled_" + dimension]  = 0
 
     try:
@@ -38,14 +181,30 @@ def project_dimensions(project, width=200, height=200, scale=1, background_color
     except KeyError:
         d['unit'] = "None"
 
-    needed_width = (d['width']* 3) + (d['depth'] * 3) + (figure_spacing * 2) + x_offset
-    # add 50 for caption
-    needed_height = (d['height'] + (d['depth'] * fore_shorten) + y_offset + 50)
-    if width < (needed_width):
-        width = int(needed_width)
+    caption = "{unscaled_width} x {unscaled_depth} x {unscaled_height} \nunits: {unit}\ntag: {name}\nscale: {scale}"
+    caption_offset = 10
+    # measure caption with the widest scale round() gives
+    caption_width, caption_height = ImageDraw.Draw(PILImage.new('1', (1, 1))).multiline_textsize(caption.format(**dict(d, scale=max(str(round(scale, 6)), "0.000000", key=len))))
+
+    def canvas_size(scale):
+        needed_width = (d['unscaled_width'] * scale * 3) + (d['unscaled_depth'] * scale * 3) + (figure_spacing * 2) + x_offset
+        needed_width = max(needed_width, x_offset + caption_width)
+        # caption is below the facing figure
+        figure_bottom = (d['unscaled_height'] * scale) + (d['unscaled_depth'] * scale * fore_shorten) + y_offset
+        caption_bottom = (d['unscaled_height'] * scale) + y_offset + caption_offset + caption_height
+        needed_height = max(figure_bottom, caption_bottom) + y_offset
+        return (max(width, math.ceil(needed_width)), max(height, math.ceil(needed_height)))
+
+    canvas_budget = None
+    if memory_budget is not None:
+        canvas_budget = memory_budget * CANVAS_BUDGET_FRACTION
+    scale = fit_scale(canvas_size, scale, canvas_budget)
+    d['scale'] = round(scale, 6)
+
+    for dimension in ['width', 'height', 'depth']:
+        d[dimension] = d["unscaled_" + dimension] * scale
 
-    if height < (needed_height):
-        height = int(needed_height)
+    width, height = canvas_size(scale)
 
     dimensions_image = PILImage.new('RGB', (width, height), background_color)
     draw = ImageDraw.Draw(dimensions_image, 'RGBA')
@@ -82,28 +241,110 @@ def project_dimensions(project, width=200, height=200, scale=1, background_color
     # foreground square, front
     draw.rectangle([fore_upper_left_corner, fore_upper_left_corner[0] + d['width'], fore_upper_left_corner[1] + d['height']], outline=(255, 255, 255, 255))
     # print dimensions at bottom of figure
-    draw.text([x_offset, y_offset + d['height'] + 10], "{unscaled_width} x {unscaled_depth} x {unscaled_height} \nunits: {unit}\ntag: {name}".format(**d))
+    draw.text([x_offset, y_offset + d['height'] + caption_offset], caption.format(**d))
 
     # dimensions_image.show()
-    if filename:
-        image_filename = '/tmp/{}.jpg'.format(str(uuid.uuid4()))
-        dimensions_image.save(image_filename)
-        filename = image_filename
+    filename, file = image_output(dimensions_image, filename, stream=stream)
 
-    file = io.BytesIO()
-    extension = 'JPEG'
-    dimensions_image.save(file, extension)
-    dimensions_image.close()
-    file.seek(0)
+    if return_scale:
+        return (filename, file, scale)
 
     return (filename, file)
 
-def vertical_texture(draw, spacing, top, height, width):
-    # draw mutable, so no return
-    for space in range(0, width, round(width / spacing)):
-        draw.line((space, top, space, top + height), width=2, fill=(255, 255, 255, 128))
-
-def project_overview(project, width, height, filename=None, orientation='horizontal', step_offset=0, background_palette_field="", texturing=None, coloring=None, color_key=False, background_color=(155, 155, 155, 255)):
+# texture patterns are rasterized once as small 'L'
+# tiles where the value is the opacity of the texture
+# color, then tiled and pasted as a mask into cells.
+# project_overview texturing values of 0 and -1 are
+# aliases for continuous and discontinuous
+TEXTURE_ALIASES = {0 : "continuous", -1 : "discontinuous"}
+TEXTURE_COLOR = (255, 255, 255)
+TEXTURE_OPACITY = 128
+
+def continuous_tile(draw, size):
+    draw.line((0, 0, 0, size), width=2, fill=TEXTURE_OPACITY)
+
+def discontinuous_tile(draw, size):
+    draw.line((0, 0, 0, size // 2 - 1), width=2, fill=TEXTURE_OPACITY)
+
+def hatched_tile(draw, size):
+    draw.line((0, 0, size, size), width=2, fill=TEXTURE_OPACITY)
+
+TEXTURE_PATTERNS = {
+    "continuous" : continuous_tile,
+    "discontinuous" : discontinuous_tile,
+    "hatched" : hatched_tile,
+}
+
+@functools.lru_cache(maxsize=None)
+def texture_tile(pattern, size=8):
+    tile = PILImage.new('L', (size, size), 0)
+    TEXTURE_PATTERNS[pattern](ImageDraw.Draw(tile), size)
+    return tile
+
+def tiled_texture(pattern, width, height, size=8):
+    """Return an 'L' mask of width, height filled with
+    the pattern tile, built by doubling the tile so the
+    number of pastes grows with log of the size"""
+    mask = texture_tile(pattern, size)
+    while mask.width < width:
+        wider = PILImage.new('L', (min(mask.width * 2, width), mask.height), 0)
+        wider.paste(mask, (0, 0))
+        wider.paste(mask, (mask.width, 0))
+        mask = wider
+    while mask.height < height:
+        taller = PILImage.new('L', (mask.width, min(mask.height * 2, height)), 0)
+        taller.paste(mask, (0, 0))
+        taller.paste(mask, (0, mask.height))
+        mask = taller
+    return mask
+
+def texture_mask(pattern, box, size=8, tiled=None):
+    """Return an 'L' mask for box filled with the
+    pattern tile, offset so tiles are aligned to the
+    image's 0,0 and separately textured runs line up
+
+    tiled is an optional dict used to reuse tiled
+    masks between calls"""
+    x1, y1, x2, y2 = box
+    offset_x = x1 % size
+    offset_y = y1 % size
+    # round up to whole tiles so runs of similar
+    # size share a tiled mask
+    width = -(-(x2 - x1 + offset_x) // size) * size
+    height = -(-(y2 - y1 + offset_y) // size) * size
+    if tiled is None:
+        tiled = {}
+    key = (pattern, size, width, height)
+    if key not in tiled:
+        tiled[key] = tiled_texture(pattern, width, height, size)
+    if tiled[key].size == (x2 - x1, y2 - y1):
+        return tiled[key]
+    return tiled[key].crop((offset_x, offset_y, offset_x + x2 - x1, offset_y + y2 - y1))
+
+def texture_pattern(value):
+    """Return pattern name for a texturing value
+    or None if the value is not a known pattern"""
+    try:
+        value = TEXTURE_ALIASES.get(value, value)
+    except TypeError:
+        return None
+    if value in TEXTURE_PATTERNS:
+        return value
+    return None
+
+def apply_textures(img, texture_runs):
+    """Paste textures into img, texture_runs is a
+    list of (pattern, (x1, y1, x2, y2)) cells with
+    x2, y2 exclusive"""
+    # tiled masks are reused between runs of similar
+    # size and dropped once the image is textured
+    tiled = {}
+    for pattern, box in texture_runs:
+        if box[2] <= box[0] or box[3] <= box[1]:
+            continue
+        img.paste(TEXTURE_COLOR, box, texture_mask(pattern, box, tiled=tiled))
+
+def project_overview(project, width, height, filename=None, orientation='horizontal', step_offset=0, background_palette_field="", texturing=None, coloring=None, color_key=False, background_color=(155, 155, 155, 255), stream=False):
     # the lattice ui uses a sequence broken into 
     # blocks of images for the accordion view
     #
@@ -177,6 +418,8 @@ def project_overview(project, width, height, filename=None, orientation='horizon
     subcount = 0
     text_inset = 25
     color_keys = {}
+    # (pattern, cell, last step_num) for each textured run
+    texture_runs = []
     for step_num, step in enumerate(sequence_steps):
         if step is None:
             color = coloring['None']['fill']
@@ -244,17 +487,27 @@ def project_overview(project, width, height, filename=None, orientation='horizon
                         break
         if texturing:
             try:
-                if texturing[step_num] == 0:
-                    # continuous draw vertical lines
-                    draw_stack.append(functools.partial(vertical_texture, draw, 8, y1, stepwise, width))
-                elif texturing[step_num] == -1:
-                    # discontinuous
-                    pass
+                pattern = texture_pattern(texturing[step_num])
             except IndexError:
-                pass
-        # draw cells
-        for dc in draw_stack:
-            dc()
+                pattern = None
+            if pattern is not None:
+                # consecutive steps with the same pattern
+                # are textured as a single run
+                if orientation == 'vertical':
+                    cell = (0, round(height / len(sequence_steps) * step_num), width, round(height / len(sequence_steps) * (step_num + 1)))
+                else:
+                    cell = (round(width / len(sequence_steps) * step_num), 0, round(width / len(sequence_steps) * (step_num + 1)), height)
+                if texture_runs and texture_runs[-1][0] == pattern and texture_runs[-1][2] == step_num - 1:
+                    run_cell = texture_runs[-1][1]
+                    texture_runs[-1] = (pattern, (run_cell[0], run_cell[1], cell[2], cell[3]), step_num)
+                else:
+                    texture_runs.append((pattern, cell, step_num))
+
+    # draw cells
+    for dc in draw_stack:
+        dc()
+
+    apply_textures(overview_image, [(pattern, cell) for pattern, cell, _ in texture_runs])
 
     if color_key is True:
         key_offset = 5
@@ -281,16 +534,7 @@ def project_overview(project, width, height, filename=None, orientation='horizon
             else:
                 x_start += key_width
 
-    if filename:
-        image_filename = '/tmp/{}.jpg'.format(str(uuid.uuid4()))
-        overview_image.save(image_filename)
-        filename = image_filename
-
-    file = io.BytesIO()
-    extension = 'JPEG'
-    overview_image.save(file, extension)
-    overview_image.close()
-    file.seek(0)
+    filename, file = image_output(overview_image, filename, stream=stream)
 
     return (filename, file)
 
@@ -298,7 +542,7 @@ def project_overview(project, width, height, filename=None, orientation='horizon
 #     # all groups on a single image
 #     pass
 
-def groups(groups, width=200, height=200, scale=1, background_color=(155, 155, 155, 255), filename=None):
+def groups(groups, width=200, height=200, scale=1, background_color=(155, 155, 155, 255), filename=None, stream=False):
     group_imgs = []
     for group in groups:
         group_imgs.append(draw_group(group))
@@ -318,16 +562,7 @@ def groups(groups, width=200, height=200, scale=1, background_color=(155, 155, 1
         y_offset += group_img.height
     #img.show()
 
-    if filename:
-        image_filename = '/tmp/{}.jpg'.format(str(uuid.uuid4()))
-        img.save(image_filename)
-        filename = image_filename
-
-    file = io.BytesIO()
-    extension = 'JPEG'
-    img.save(file, extension)
-    img.close()
-    file.seek(0)
+    filename, file = image_output(img, filename, stream=stream)
 
     return (filename, file)
 
@@ -425,7 +660,7 @@ def draw_group(group, width=400, height=200, scale=1, background_color=(155, 155
     return img
 
 
-def rules(rules, groups=None, width=200, height=200, scale=1, background_color=(155, 155, 155, 255), filename=None):
+def rules(rules, groups=None, width=200, height=200, scale=1, background_color=(155, 155, 155, 255), filename=None, stream=False):
     # current and future notes:
     #
     # This function and the function it calls, rules both take
@@ -446,8 +681,9 @@ def rules(rules, groups=None, width=200, height=200, scale=1, background_color=(
     # [Rule(source_field='center', comparator_symbol='is', comparator_params=['int'], dest_field='chapter', rule_result='bar', rough_amount=0)]
     # [Rule(source_field='left_corner', comparator_symbol='between', comparator_params=['6', '10'], dest_field='chapter', rule_result='bar', rough_amount=0)]
     rule_imgs = []
+    renderer = RuleCardRenderer(groups)
     for rule in rules:
-        rule_imgs.append(draw_rule(rule, groups))
+        rule_imgs.append(renderer.render(rule))
 
     try:
         width = max([rule.width for rule in rule_imgs])
@@ -464,53 +700,18 @@ def rules(rules, groups=None, width=200, height=200, scale=1, background_color=(
         y_offset += rule_img.height
     #img.show()
 
-    if filename:
-        image_filename = '/tmp/{}.jpg'.format(str(uuid.uuid4()))
-        img.save(image_filename)
-        filename = image_filename
-
-    file = io.BytesIO()
-    extension = 'JPEG'
-    img.save(file, extension)
-    img.close()
-    file.seek(0)
+    filename, file = image_output(img, filename, stream=stream)
 
     return (filename, file)
 
-def draw_rule(rule, groups=None, width=400, height=200, scale=1, background_color=(155, 155, 155, 255)):
+class RuleCardRenderer(object):
+    """Render rule cards, caching a base layer of
+    the source field box and highlight for each
+    source_field so rules sharing a source_field
+    only draw their own text
 
-    # nested functions using some variables from draw_rule scope
-    def middle(value):
-        return int(value / 2)
-
-    def above_field(text, font):
-        text = str(text)
-        text_width, text_height = draw.textsize(text, font=font)
-        return (field_x + middle(field_width) - middle(text_width), field_y + 0 - text_height)
-
-    def below_field(text, font):
-        text = str(text)
-        text_width, text_height = draw.textsize(text, font=font)
-        return (field_x + middle(field_width) - middle(text_width), field_y + field_height)
-
-    def left_field(text, font):
-        text = str(text)
-        text_width, text_height = draw.textsize(text, font=font)
-        print(text, text_width)
-        return (field_x - text_width, field_y + middle(field_height))
-
-    def right_field(text, font):
-        text = str(text)
-        text_width, text_height = draw.textsize(text, font=font)
-        return (field_x + field_width, field_y + middle(field_height))
-
-    def far_left_field(text, font):
-        text = str(text)
-        text_width, text_height = draw.textsize(text, font=font)
-        return (0, field_y + middle(field_height))
-
-    img = PILImage.new('RGB', (width, height), background_color)
-    draw = ImageDraw.Draw(img, 'RGBA')
+    groups are looked up by name through an index
+    instead of scanning the list for every rule"""
 
     # set defaults
     rescale_group = .15
@@ -521,59 +722,119 @@ def draw_rule(rule, groups=None, width=400, height=200, scale=1, background_colo
     text_color = "black"
     subtle_text_color = "lightgray"
 
-    field_width = 50
-    field_height = 100
-    field_highlight = None
-    field_highlight_color = None
-
-    if groups:
-        for group in groups:
-            if group.name == rule.source_field:
-                field_width = group.source_dimensions_scaled[0] * rescale_group
-                field_height = group.source_dimensions_scaled[1] * rescale_group
-                field_highlight = [ coord * rescale_group for coord in group.regions[0]]
-                field_highlight[0] += field_x
-                field_highlight[2] += field_x
-                field_highlight[1] += field_y
-                field_highlight[3] += field_y
-
-                # group object group coords use kivy coordinate system
-                # see note in rules about using xml
-                w = abs(field_highlight[0] - field_highlight[2])
-                h = abs(field_highlight[1] - field_highlight[3])
-
-                field_highlight[0] -= w
-                field_highlight[2] -= w
-
-                field_highlight[1] += field_height - h
-                field_highlight[3] += field_height - h
-
-                field_highlight_color = group.color.hex_l
-
-    try:
-        font = ImageFont.truetype("DejaVuSerif-Bold.ttf", 20)
-    except:
-        font = None
-
-    draw.text(above_field(rule.source_field, font), str(rule.source_field), font=font, fill=subtle_text_color)
-    draw.rectangle((field_x, field_y, field_x + field_width, field_y + field_height), outline=border_color, fill=color)
-
-    try:
-        # pillow is picky about strings, str() to be sure
-        horizontal_text = "{} {}".format(rule.dest_field, rule.rule_result)
-        draw.text(far_left_field(horizontal_text, font), str(horizontal_text), font=font, fill=text_color)
-        draw.text(below_field(rule.comparator_symbol, font), str(rule.comparator_symbol), font=font, fill=text_color)
-
-        draw.text(left_field(rule.comparator_params[0], font), str(rule.comparator_params[0]), font=font, fill=text_color)
-        draw.text(right_field(rule.comparator_params[1], font), str(rule.comparator_params[1]), font=font, fill=text_color)
+    def __init__(self, groups=None, width=400, height=200, scale=1, background_color=(155, 155, 155, 255)):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.background_color = background_color
+        # later groups with the same name take precedence
+        self.groups = {group.name : group for group in groups or []}
+        # (source_field, width, height) :
+        # (base image, field rectangle, highlight, highlight color)
+        self.base_layers = {}
         try:
-            draw.rectangle(field_highlight, fill=field_highlight_color)
+            self.font = ImageFont.truetype("DejaVuSerif-Bold.ttf", 20)
         except:
+            self.font = None
+
+    def field_geometry(self, group):
+        field_width = 50
+        field_height = 100
+        field_highlight = None
+        field_highlight_color = None
+
+        if group is not None:
+            field_width = group.source_dimensions_scaled[0] * self.rescale_group
+            field_height = group.source_dimensions_scaled[1] * self.rescale_group
+            field_highlight = [ coord * self.rescale_group for coord in group.regions[0]]
+            field_highlight[0] += self.field_x
+            field_highlight[2] += self.field_x
+            field_highlight[1] += self.field_y
+            field_highlight[3] += self.field_y
+
+            # group object group coords use kivy coordinate system
+            # see note in rules about using xml
+            w = abs(field_highlight[0] - field_highlight[2])
+            h = abs(field_highlight[1] - field_highlight[3])
+
+            field_highlight[0] -= w
+            field_highlight[2] -= w
+
+            field_highlight[1] += field_height - h
+            field_highlight[3] += field_height - h
+
+            field_highlight_color = group.color.hex_l
+
+        return field_width, field_height, field_highlight, field_highlight_color
+
+    def base_layer(self, source_field):
+        key = (source_field, self.width, self.height)
+        if key not in self.base_layers:
+            field_width, field_height, field_highlight, field_highlight_color = self.field_geometry(self.groups.get(source_field))
+            img = PILImage.new('RGB', (self.width, self.height), self.background_color)
+            draw = ImageDraw.Draw(img, 'RGBA')
+            field = (self.field_x, self.field_y, field_width, field_height)
+            draw.text(self.above_field(draw, field, source_field), str(source_field), font=self.font, fill=self.subtle_text_color)
+            draw.rectangle((self.field_x, self.field_y, self.field_x + field_width, self.field_y + field_height), outline=self.border_color, fill=self.color)
+            # highlight is drawn over the rule text so
+            # it is cached rather than drawn on the base
+            self.base_layers[key] = (img, field, field_highlight, field_highlight_color)
+        return self.base_layers[key]
+
+    def render(self, rule):
+        base, field, field_highlight, field_highlight_color = self.base_layer(rule.source_field)
+        img = base.copy()
+        draw = ImageDraw.Draw(img, 'RGBA')
+        font = self.font
+        text_color = self.text_color
+        try:
+            # pillow is picky about strings, str() to be sure
+            horizontal_text = "{} {}".format(rule.dest_field, rule.rule_result)
+            draw.text(self.far_left_field(draw, field, horizontal_text), str(horizontal_text), font=font, fill=text_color)
+            draw.text(self.below_field(draw, field, rule.comparator_symbol), str(rule.comparator_symbol), font=font, fill=text_color)
+
+            draw.text(self.left_field(draw, field, rule.comparator_params[0]), str(rule.comparator_params[0]), font=font, fill=text_color)
+            draw.text(self.right_field(draw, field, rule.comparator_params[1]), str(rule.comparator_params[1]), font=font, fill=text_color)
+            try:
+                draw.rectangle(field_highlight, fill=field_highlight_color)
+            except:
+                pass
+        except Exception as ex:
+            print(ex)
             pass
-        # img.show()
-    except Exception as ex:
-        print(ex)
-        pass
+        return img
 
-    # img.close()
-    return img
+    # text positions relative to field (x, y, width, height)
+    @staticmethod
+    def middle(value):
+        return int(value / 2)
+
+    def above_field(self, draw, field, text):
+        field_x, field_y, field_width, field_height = field
+        text_width, text_height = draw.textsize(str(text), font=self.font)
+        return (field_x + self.middle(field_width) - self.middle(text_width), field_y + 0 - text_height)
+
+    def below_field(self, draw, field, text):
+        field_x, field_y, field_width, field_height = field
+        text_width, text_height = draw.textsize(str(text), font=self.font)
+        return (field_x + self.middle(field_width) - self.middle(text_width), field_y + field_height)
+
+    def left_field(self, draw, field, text):
+        field_x, field_y, field_width, field_height = field
+        text_width, text_height = draw.textsize(str(text), font=self.font)
+        return (field_x - text_width, field_y + self.middle(field_height))
+
+    def right_field(self, draw, field, text):
+        field_x, field_y, field_width, field_height = field
+        return (field_x + field_width, field_y + self.middle(field_height))
+
+    def far_left_field(self, draw, field, text):
+        field_x, field_y, field_width, field_height = field
+        return (0, field_y + self.middle(field_height))
+
+def draw_rule(rule, groups=None, width=400, height=200, scale=1, background_color=(155, 155, 155, 255), renderer=None):
+    # pass a RuleCardRenderer to reuse its cached
+    # base layers across calls
+    if renderer is None:
+        renderer = RuleCardRenderer(groups, width=width, height=height, scale=scale, background_color=background_color)
+    return renderer.render(rule)
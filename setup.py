@@ -11,5 +11,9 @@ name="ma_wip",
     data_files = [("", ["LICENSE.txt"])],
     url="",
     packages=find_packages(),
-    install_requires=['Pillow', 'attrs', 'colour'],
+    install_requires=['Pillow', 'attrs', 'colour', 'numpy'],
+    entry_points='''
+        [console_scripts]
+        ma-wip-render=ma_wip.render:main
+    ''',
 )
@@ -0,0 +1,46 @@
+import numpy as np
+
+from ma_wip.ling_classes import Group
+from ma_wip.group_collection import GroupCollection
+
+def mixed_groups():
+    groups = [Group(regions=[[10, 20, 50, 60]], name="single", source_dimensions=[400, 300]),
+              Group(regions=[[10, 20, 50, 60], [40, 5, 90, 45], [0, 30, 20, 80]], name="multiple", source_dimensions=[400, 300]),
+              Group(regions=[], name="empty", source_dimensions=[400, 300]),
+              Group(regions=[[100, 100, 150, 180]], name="no dimensions")]
+    for group in groups:
+        group.display_offset_x = 5
+        group.display_offset_y = 3
+        group.source_width = 800
+        group.source_height = 600
+    return groups
+
+def assert_row(row, expected):
+    if expected is None or None in expected:
+        assert np.isnan(row).all()
+    else:
+        assert row.tolist() == expected
+
+def test_geometry_matches_groups():
+    groups = mixed_groups()
+    collection = GroupCollection.from_groups(groups)
+    region_rectangles = collection.region_rectangle()
+    bounding_rectangles = collection.bounding_rectangle()
+    scaled_rectangles = collection.scaled_bounding_rectangle(5, 3, 800, 600)
+    for row, group in enumerate(groups):
+        assert_row(region_rectangles[row], group.region_rectangle())
+        assert_row(bounding_rectangles[row], group.bounding_rectangle)
+        assert_row(scaled_rectangles[row], group.scaled_bounding_rectangle if group.source_dimensions else None)
+
+def test_contains_point_matches_groups():
+    groups = mixed_groups()
+    collection = GroupCollection.from_groups(groups)
+    for x, y in ((30, 40), (85, 10), (120, 150), (0, 0), (50, 60)):
+        assert collection.bounding_contains_point(x, y).tolist() == [group.bounding_contains_point(x, y) for group in groups]
+
+def test_round_trip():
+    groups = mixed_groups()
+    round_tripped = GroupCollection.from_groups(groups).to_groups()
+    assert [group.regions for group in round_tripped] == [group.regions for group in groups]
+    assert [group.source_dimensions for group in round_tripped] == [group.source_dimensions for group in groups]
+    assert [(group.name, group.color, group.hide, group.source) for group in round_tripped] == [(group.name, group.color, group.hide, group.source) for group in groups]
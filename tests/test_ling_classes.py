@@ -0,0 +1,22 @@
+from ma_wip.ling_classes import Rule, RuleOverlap, RuleSet
+
+def test_between_overlaps_and_conflicts():
+    rules = RuleSet([Rule("page", "between", ["1", "5"], "chapter", "a"),
+                     Rule("page", "between", ["5", "9"], "chapter", "b"),
+                     Rule("page", "between", ["10", "12"], "chapter", "b")])
+    assert [overlap.rules for overlap in rules.overlaps] == [(rules.rules[0], rules.rules[1])]
+    assert len(rules.conflicts) == 1
+
+def test_keyed_overlaps_case_fold():
+    rules = RuleSet([Rule("title", "~~", ["Foo"], "chapter", "a"),
+                     Rule("title", "~~", ['"foo"'], "chapter", "a")])
+    assert len(rules.overlaps) == 1
+    assert rules.conflicts == []
+
+def test_unhashable_params_skipped():
+    rules = RuleSet([Rule("page", "is", [["int"]], "chapter", "a"),
+                     Rule("page", "is", ["int"], "chapter", "b")])
+    assert rules.overlaps == []
+
+def test_empty_overlap_is_not_conflict():
+    assert RuleOverlap().conflict is False
@@ -0,0 +1,36 @@
+import json
+import os
+
+from ma_wip import render
+
+def dimensions_job(**job):
+    job.update({"type" : "dimensions", "args" : {"project" : {"width" : 10, "height" : 20, "depth" : 5}}})
+    return json.dumps(job)
+
+def exit_on_second_line(line_number, line, output_dir):
+    if line_number == 2:
+        os._exit(1)
+    return {'line' : line_number, 'id' : None, 'output' : ''}
+
+def test_render_jobs_streams_results_and_errors(tmpdir):
+    jobs = [(1, dimensions_job(id="box")), (2, "not json"), (3, json.dumps({"type" : "bogus"}))]
+    results = {result['line'] : result for result in render.render_jobs(jobs, str(tmpdir), workers=2)}
+    assert results[1]['output'] == os.path.join(str(tmpdir), "box.jpg")
+    assert 'error' in results[2]
+    assert 'error' in results[3]
+
+def test_render_jobs_id_stays_in_output_dir(tmpdir):
+    jobs = [(1, dimensions_job(id="../../escape")), (2, dimensions_job(id="ch/1"))]
+    results = list(render.render_jobs(jobs, str(tmpdir), workers=1))
+    for result in results:
+        assert os.path.dirname(result['output']) == str(tmpdir)
+
+def test_render_jobs_survives_dead_worker(tmpdir, monkeypatch):
+    monkeypatch.setattr(render, "render_job", exit_on_second_line)
+    jobs = [(line_number, dimensions_job(id=str(line_number))) for line_number in range(1, 7)]
+    results = list(render.render_jobs(jobs, str(tmpdir), workers=1))
+    assert sorted(result['line'] for result in results) == list(range(1, 7))
+    failed = [result for result in results if 'error' in result]
+    assert 2 in [result['line'] for result in failed]
+    assert all(result['id'] == str(result['line']) for result in failed)
+    assert any('error' not in result for result in results if result['line'] > 2)
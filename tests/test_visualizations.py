@@ -0,0 +1,116 @@
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from PIL import Image
+
+from ma_wip import visualizations
+from ma_wip.ling_classes import Group, Rule
+
+MEGABYTE = 1024 * 1024
+
+PEAK_RSS_SCRIPT = """
+import contextlib, io, json, os, resource, sys
+from ma_wip import visualizations
+from PIL import Image
+
+def peak():
+    # ru_maxrss is kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+budget = int(sys.argv[1])
+# warm up pillow so its own allocations are in the baseline
+Image.new('RGB', (10, 10)).save(io.BytesIO(), 'JPEG')
+before = peak()
+with contextlib.redirect_stdout(io.StringIO()):
+    filename, _, scale = visualizations.project_dimensions({'width' : 210000, 'height' : 297000, 'depth' : 20000, 'unit' : 'mm'}, filename=True, memory_budget=budget, return_scale=True)
+growth = peak() - before
+os.remove(filename)
+print(json.dumps({'growth' : growth, 'scale' : scale}))
+"""
+
+def peak_rss_growth(budget):
+    output = subprocess.check_output([sys.executable, "-c", PEAK_RSS_SCRIPT, str(budget)])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def test_project_dimensions_peak_rss_within_budget():
+    for budget in (64 * MEGABYTE, visualizations.DEFAULT_MEMORY_BUDGET):
+        result = peak_rss_growth(budget)
+        assert 0 < result['scale'] < 1
+        assert result['growth'] <= budget
+
+def test_project_dimensions_small_project_keeps_scale():
+    _, _, scale = visualizations.project_dimensions({'width' : 10, 'height' : 20, 'depth' : 5}, return_scale=True)
+    assert scale == 1
+
+def test_project_dimensions_no_budget():
+    _, _, scale = visualizations.project_dimensions({'width' : 20000, 'height' : 1000, 'depth' : 0}, memory_budget=None, return_scale=True)
+    assert scale == 1
+
+def test_project_dimensions_caption_fits():
+    # shallow projects leave no room below the figures
+    # so the caption decides the canvas height
+    for project in ({'width' : 210, 'height' : 297, 'depth' : 20, 'unit' : 'mm'}, {'width' : 100, 'height' : 300, 'depth' : 0}):
+        _, file = visualizations.project_dimensions(project)
+        image = Image.open(file).convert('L')
+        width, height = image.size
+        caption = image.crop((0, height - 30, width, height - 8))
+        margin = image.crop((0, height - 5, width, height))
+        assert caption.getextrema()[1] > 220
+        assert margin.getextrema()[1] < 200
+
+def test_project_dimensions_non_finite_dimensions():
+    for value in ("nan", "inf", "-inf"):
+        filename, file = visualizations.project_dimensions({'width' : value, 'height' : 20, 'depth' : 5})
+        assert file.read(2) == b'\xff\xd8'
+
+def test_texture_mask_runs_line_up():
+    whole = visualizations.texture_mask("hatched", (0, 0, 40, 30))
+    left = visualizations.texture_mask("hatched", (0, 0, 13, 30))
+    right = visualizations.texture_mask("hatched", (13, 0, 40, 30))
+    assert left.tobytes() == whole.crop((0, 0, 13, 30)).tobytes()
+    assert right.tobytes() == whole.crop((13, 0, 40, 30)).tobytes()
+
+def test_rule_card_renderer_reuses_base_layers():
+    groups = []
+    for number in range(2):
+        group = Group(regions=[[100 + number * 10, 100, 200, 180]], name="field{}".format(number))
+        group.source_dimensions_scaled = [400, 600]
+        groups.append(group)
+    rules = [Rule("field{}".format(number % 2), "between", [str(number), str(number + 5)], "chapter", str(number)) for number in range(6)]
+    renderer = visualizations.RuleCardRenderer(groups)
+    with contextlib.redirect_stdout(io.StringIO()):
+        images = [renderer.render(rule) for rule in rules]
+        assert len(renderer.base_layers) == 2
+        for rule, image in zip(rules, images):
+            fresh = visualizations.RuleCardRenderer(groups).render(rule)
+            assert image.tobytes() == fresh.tobytes()
+
+def noise_image(size=1000):
+    # noise compresses poorly, giving many chunks
+    return Image.effect_noise((size, size), 64).convert('RGB')
+
+def test_streamed_output_matches_buffered():
+    project = {'width' : 210, 'height' : 297, 'depth' : 20, 'unit' : 'mm'}
+    _, buffered = visualizations.project_dimensions(project)
+    _, chunks = visualizations.project_dimensions(project, stream=True)
+    assert b"".join(chunks) == buffered.getvalue()
+
+def test_closing_stream_stops_encoder():
+    threads = set(threading.enumerate())
+    chunks = visualizations.encoded_chunks(noise_image())
+    next(chunks)
+    assert set(threading.enumerate()) != threads
+    chunks.close()
+    assert set(threading.enumerate()) == threads
+
+def test_encoder_error_raised_to_reader():
+    # jpeg can not store an alpha channel
+    chunks = visualizations.encoded_chunks(Image.new('RGBA', (10, 10)))
+    with pytest.raises(OSError):
+        b"".join(chunks)